@@ -1,6 +1,9 @@
 import time
 import os
 from pywinauto import Application
+from pywinauto.findwindows import ElementNotFoundError
+from pywinauto.controls.uiawrapper import UIAWrapper
+from pywinauto.uia_element_info import UIAElementInfo
 import argparse
 import sys
 import json
@@ -8,8 +11,17 @@ import traceback
 from PIL import Image, ImageChops
 import numpy as np
 from functools import wraps
-import csv
+import atexit
+import array
+import types
 import ctypes
+from ctypes import wintypes
+import threading
+import comtypes.client
+from comtypes import COMError, COMObject
+
+# UIA type library, already generated by pywinauto's uia backend.
+UIA = comtypes.client.GetModule("UIAutomationCore.dll")
 
 # Constants for Windows Power Management
 ES_CONTINUOUS = 0x80000000
@@ -18,10 +30,28 @@ ES_DISPLAY_REQUIRED = 0x00000002
 
 # --- LOGGING & TIMING UTILITY ---
 class PerformanceLogger:
-    def __init__(self, console_debug=False):
+    CAPACITY = 8192
+    FLUSH_INTERVAL = 1.0
+
+    def __init__(self, console_debug=False, path="debug_timings.csv"):
         self.console_debug = console_debug  
+        self.enabled = True
+        self.path = path
         self.level = 0
-        self.timings = [] 
+        self.last_flush = time.monotonic()
+
+        self.strftime = time.strftime
+        self.localtime = time.localtime
+
+        # Parallel arrays instead of a dict per call, written out whenever the buffer fills.
+        self.names = [None] * self.CAPACITY
+        self.ts = array.array('d', [0.0]) * self.CAPACITY
+        self.dur = array.array('d', [0.0]) * self.CAPACITY
+        self.head = 0
+
+        # Opened on the first flush, so runs with timings disabled never touch the file.
+        self.f = None
+        atexit.register(self.close)
 
     def log_entry(self, name):
         if self.console_debug:
@@ -32,29 +62,172 @@ class PerformanceLogger:
         self.level -= 1
         if self.console_debug:
             print(f"{'  ' * self.level}Exiting {name} ({duration:.4f}s)", file=sys.stderr, flush=True)
+        if not self.enabled:
+            return
         
-        self.timings.append({
-            'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
-            'function': name, 
-            'duration': round(duration, 6)
-        })
+        h = self.head
+        self.names[h] = name
+        self.ts[h] = time.time()
+        self.dur[h] = duration
+        self.head = h + 1
+        if self.head == self.CAPACITY or time.monotonic() - self.last_flush > self.FLUSH_INTERVAL:
+            self.flush()
 
-    def save_timings(self):
-        if self.timings:
-            file_exists = os.path.exists("debug_timings.csv")
+    def disable(self):
+        """Drops buffered rows and stops recording, used when neither console nor file timings are wanted."""
+        self.enabled = False
+        self.head = 0
+
+    def open_log(self):
+        # Stream rows as they are logged so memory stays bounded and a crash keeps the data.
+        self.f = open(self.path, "a", newline="", buffering=8192)
+        # Append mode starts at the end of the file, so position 0 means it is new or empty.
+        if self.f.tell() == 0:
+            self.f.write("timestamp,function,duration\n")
+
+    def flush(self):
+        """Writes the buffered rows in one call and resets the buffer."""
+        if not self.enabled:
+            return
+        try:
+            if self.f is None:
+                self.open_log()
+            n = self.head
+            if n:
+                fmt, localtime = self.strftime, self.localtime
+                # Names are checked in debug_trace, so the rows need no CSV quoting.
+                self.f.write("".join(
+                    f"{fmt('%Y-%m-%d %H:%M:%S', localtime(t))},{name},{d:.6f}\n"
+                    for name, t, d in zip(self.names[:n], self.ts[:n], self.dur[:n])
+                ))
+                self.head = 0
+            self.f.flush()
+        except OSError as e:
+            # Timings must never break the traced call, stop recording instead.
+            print(f"Failed to save timings: {e}", file=sys.stderr, flush=True)
+            self.disable()
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        if self.head:
+            self.flush()
+        if self.f is not None and not self.f.closed:
             try:
-                with open("debug_timings.csv", "a", newline="") as f:
-                    writer = csv.DictWriter(f, fieldnames=['timestamp', 'function', 'duration'])
-                    if not file_exists:
-                        writer.writeheader()
-                    writer.writerows(self.timings)
-                print(f"Performance timings saved to debug_timings.csv", file=sys.stderr, flush=True)
-            except Exception as e:
+                self.f.close()
+            except OSError as e:
                 print(f"Failed to save timings: {e}", file=sys.stderr, flush=True)
 
+    def save_timings(self):
+        """Kept for callers of the old API, rows are now written as they are logged."""
+        pass
+
 perf_logger = PerformanceLogger()
 
+# --- UIA EVENTS ---
+class ButtonEventHandler(COMObject):
+    """Sets a threading.Event whenever UIA reports a change on the watched button."""
+    _com_interfaces_ = [
+        UIA.IUIAutomationPropertyChangedEventHandler,
+        UIA.IUIAutomationStructureChangedEventHandler,
+    ]
+
+    def __init__(self, changed_event):
+        super().__init__()
+        self.changed_event = changed_event
+
+    def HandlePropertyChangedEvent(self, sender, propertyId, newValue):
+        self.changed_event.set()
+
+    def HandleStructureChangedEvent(self, sender, changeType, runtimeId):
+        self.changed_event.set()
+
+# --- SCREEN CAPTURE ---
+SRCCOPY = 0x00CC0020
+CAPTUREBLT = 0x40000000
+DIB_RGB_COLORS = 0
+
+class BITMAPINFOHEADER(ctypes.Structure):
+    _fields_ = [
+        ("biSize", wintypes.DWORD),
+        ("biWidth", wintypes.LONG),
+        ("biHeight", wintypes.LONG),
+        ("biPlanes", wintypes.WORD),
+        ("biBitCount", wintypes.WORD),
+        ("biCompression", wintypes.DWORD),
+        ("biSizeImage", wintypes.DWORD),
+        ("biXPelsPerMeter", wintypes.LONG),
+        ("biYPelsPerMeter", wintypes.LONG),
+        ("biClrUsed", wintypes.DWORD),
+        ("biClrImportant", wintypes.DWORD),
+    ]
+
+class ScreenRegionGrabber:
+    """Blits a fixed-size screen region into a preallocated DIB section exposed as a NumPy view."""
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.user32 = ctypes.windll.user32
+        self.gdi32 = ctypes.windll.gdi32
+        self.user32.GetDC.restype = wintypes.HDC
+        self.user32.GetDC.argtypes = [wintypes.HWND]
+        self.user32.ReleaseDC.argtypes = [wintypes.HWND, wintypes.HDC]
+        self.gdi32.CreateCompatibleDC.restype = wintypes.HDC
+        self.gdi32.CreateCompatibleDC.argtypes = [wintypes.HDC]
+        self.gdi32.CreateDIBSection.restype = wintypes.HBITMAP
+        self.gdi32.CreateDIBSection.argtypes = [
+            wintypes.HDC, ctypes.POINTER(BITMAPINFOHEADER), wintypes.UINT,
+            ctypes.POINTER(ctypes.c_void_p), wintypes.HANDLE, wintypes.DWORD]
+        self.gdi32.SelectObject.restype = wintypes.HGDIOBJ
+        self.gdi32.SelectObject.argtypes = [wintypes.HDC, wintypes.HGDIOBJ]
+        self.gdi32.DeleteDC.argtypes = [wintypes.HDC]
+        self.gdi32.DeleteObject.argtypes = [wintypes.HGDIOBJ]
+        self.gdi32.BitBlt.restype = wintypes.BOOL
+        self.gdi32.BitBlt.argtypes = [
+            wintypes.HDC, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+            wintypes.HDC, ctypes.c_int, ctypes.c_int, wintypes.DWORD]
+
+        header = BITMAPINFOHEADER()
+        header.biSize = ctypes.sizeof(BITMAPINFOHEADER)
+        header.biWidth = width
+        header.biHeight = -height  # top-down rows, matching NumPy order
+        header.biPlanes = 1
+        header.biBitCount = 32
+        bits = ctypes.c_void_p()
+        self.mem_dc = self.gdi32.CreateCompatibleDC(None)
+        self.bitmap = self.gdi32.CreateDIBSection(self.mem_dc, ctypes.byref(header), DIB_RGB_COLORS, ctypes.byref(bits), None, 0)
+        if not self.mem_dc or not self.bitmap:
+            # Free whichever half was created before giving up.
+            if self.bitmap:
+                self.gdi32.DeleteObject(self.bitmap)
+            if self.mem_dc:
+                self.gdi32.DeleteDC(self.mem_dc)
+            raise OSError("Unable to create capture bitmap")
+        self.gdi32.SelectObject(self.mem_dc, self.bitmap)
+
+        buffer = (ctypes.c_uint8 * (width * height * 4)).from_address(bits.value)
+        bgra = np.frombuffer(buffer, dtype=np.uint8).reshape(height, width, 4)
+        # Reversed channel view turns BGRA into RGB without copying.
+        self.rgb = bgra[:, :, 2::-1]
+
+    def grab(self, left, top):
+        """Copies the region at (left, top) into the bitmap and returns the shared RGB view.
+
+        Returns None when the blit fails (locked workstation, secure desktop), since the
+        bitmap would otherwise still hold the previous frame."""
+        screen_dc = self.user32.GetDC(None)
+        if not screen_dc:
+            return None
+        try:
+            ok = self.gdi32.BitBlt(self.mem_dc, 0, 0, self.width, self.height, screen_dc, left, top, SRCCOPY | CAPTUREBLT)
+        finally:
+            self.user32.ReleaseDC(None, screen_dc)
+        if not ok:
+            return None
+        self.gdi32.GdiFlush()
+        return self.rgb
+
 def debug_trace(func):
+    assert not any(c in func.__name__ for c in ',"\n'), f"{func.__name__} needs CSV escaping"
     @wraps(func)
     def wrapper(*args, **kwargs):
         perf_logger.log_entry(func.__name__)
@@ -66,26 +239,69 @@ def debug_trace(func):
             perf_logger.log_exit(func.__name__, duration)
     return wrapper
 
+def strip_debug_trace(cls):
+    """Swaps the debug_trace wrappers on cls back to the undecorated methods."""
+    for name, attr in list(vars(cls).items()):
+        # staticmethod objects also carry __wrapped__, only unwrap plain functions.
+        if isinstance(attr, types.FunctionType) and hasattr(attr, "__wrapped__"):
+            setattr(cls, name, attr.__wrapped__)
+
 class BeziBridge:
     @debug_trace
     def __init__(self):
         self.config_file = "bezi_bridge.json"
+        self.ref_stack_file = "ref_stack.npy"
         self.bezi_prompt = ""
         self.bezi_path = ""
         self.args = None
         self.config = None
+        self._loaded_config = None
+        self._saved_config_json = None
         self.bezi_window = None
+        self._submit_btn = None
+        self._submit_btn_rect = None
+        self._submit_btn_container = None
+        self._watched_btn = None
+        self._uia = None
+        self._button_handler = None
+        self.button_changed = threading.Event()
 
         try:
-            self.ready_icon_inactive = Image.open("ref_ready.png").convert('RGB')
-            self.ready_icon_active = Image.open("ref_ready_active.png").convert('RGB')
-            self.ready_icon_busy = Image.open("ref_busy.png").convert('RGB')
+            # Stack the references so a poll compares against all of them in one pass.
+            self.ref_stack = self.load_reference_stack()
+            self.ref_labels = ("BUSY", "INACTIVE", "READY")
+            self._xor_scratch = np.empty_like(self.ref_stack)
         except Exception as e:
             print(f"Error loading reference images: {e}", file=sys.stderr, flush=True)
 
         self.bezi_submit_btn_width = 56
         self.bezi_submit_btn_height = 56
+        try:
+            self.grabber = ScreenRegionGrabber(self.bezi_submit_btn_width, self.bezi_submit_btn_height)
+        except (OSError, AttributeError) as e:
+            print(f"Falling back to pywinauto captures: {e}", file=sys.stderr, flush=True)
+            self.grabber = None
     
+    def load_reference_stack(self):
+        """Maps the pre-decoded reference stack, rebuilding it from the PNGs when they are newer."""
+        pngs = ("ref_busy.png", "ref_ready.png", "ref_ready_active.png")
+        try:
+            if os.path.getmtime(self.ref_stack_file) > max(os.path.getmtime(p) for p in pngs):
+                return np.asarray(np.load(self.ref_stack_file, mmap_mode='r'))
+        except (OSError, ValueError):
+            pass
+        ref_stack = np.stack([self.load_reference(p) for p in pngs])
+        try:
+            np.save(self.ref_stack_file, ref_stack)
+        except OSError as e:
+            print(f"Unable to cache reference images: {e}", file=sys.stderr, flush=True)
+        return ref_stack
+
+    @staticmethod
+    def load_reference(path):
+        """Decodes a reference PNG once into a contiguous uint8 RGB array."""
+        return np.ascontiguousarray(np.asarray(Image.open(path).convert('RGB'), dtype=np.uint8))
+
     @debug_trace
     def set_keep_awake(self, keep_awake=True):
         if keep_awake:
@@ -113,9 +329,24 @@ class BeziBridge:
         #self.bezi_window.wait("visible", timeout=60)
 
     @debug_trace
-    def get_bezi_state(self):
+    def ensure_window(self):
+        """Returns the cached Bezi window, reconnecting only when it has gone stale."""
+        if self.bezi_window is not None:
+            try:
+                self.bezi_window.element_info.name
+                return self.bezi_window
+            except (COMError, ElementNotFoundError):
+                pass
         self.find_windows()
+        return self.bezi_window
+
+    @debug_trace
+    def get_bezi_state(self):
         button = self.find_submit_button()
+        if not button:
+            # Cache miss, the window handle may be stale as well.
+            self.ensure_window()
+            button = self.find_submit_button()
         if not button:
             print("unable to find submit button", file=sys.stderr, flush=True)
             exit(1)
@@ -124,71 +355,228 @@ class BeziBridge:
         
     @debug_trace
     def find_submit_button(self):
-        all_descendants = self.bezi_window.descendants()
-        for item in all_descendants:
-            rect = item.rectangle()
-            if rect.width() == self.bezi_submit_btn_width and rect.height() == self.bezi_submit_btn_height:
-                return item
+        """Returns the cached submit button, re-scanning only when it has gone stale."""
+        if self._submit_btn is not None:
+            try:
+                rect = self._submit_btn.rectangle()
+                if self.is_submit_button_rect(rect):
+                    self._submit_btn_rect = rect
+                    return self._submit_btn
+            except (COMError, ElementNotFoundError):
+                pass
+            self._submit_btn = None
+
+        try:
+            item = self.scan_for_submit_button()
+            if item is not None:
+                self._submit_btn = item
+                self._submit_btn_rect = item.rectangle()
+        except (COMError, ElementNotFoundError) as e:
+            print(f"Exception scanning for submit button: {e}", file=sys.stderr, flush=True)
+        return self._submit_btn
+
+    @debug_trace
+    def scan_for_submit_button(self):
+        """Finds the submit button with cached FindAll calls that prefetch every bounding rectangle.
+
+        Buttons under the container the last submit button was found in are tried first, then
+        every Button in the window, and only then the full tree."""
+        uia = self.get_uia()
+        cache_request = uia.CreateCacheRequest()
+        cache_request.AddProperty(UIA.UIA_BoundingRectanglePropertyId)
+        button_condition = uia.CreatePropertyCondition(UIA.UIA_ControlTypePropertyId, UIA.UIA_ButtonControlTypeId)
+
+        element = None
+        if self._submit_btn_container is not None:
+            try:
+                element = self.match_submit_rect(self._submit_btn_container.FindAllBuildCache(
+                    UIA.TreeScope_Descendants, button_condition, cache_request))
+            except COMError:
+                self._submit_btn_container = None
+
+        root = self.bezi_window.element_info.element
+        for condition in (button_condition, uia.CreateTrueCondition()):
+            if element is not None:
+                break
+            element = self.match_submit_rect(root.FindAllBuildCache(
+                UIA.TreeScope_Descendants, condition, cache_request))
+
+        if element is None:
+            return None
+        self._submit_btn_container = uia.ControlViewWalker.GetParentElement(element)
+        return UIAWrapper(UIAElementInfo(element))
+
+    def match_submit_rect(self, found):
+        for i in range(found.Length):
+            element = found.GetElement(i)
+            rect = element.CachedBoundingRectangle
+            if (rect.right - rect.left == self.bezi_submit_btn_width
+                    and rect.bottom - rect.top == self.bezi_submit_btn_height):
+                return element
         return None
 
+    def is_submit_button_rect(self, rect):
+        return rect.width() == self.bezi_submit_btn_width and rect.height() == self.bezi_submit_btn_height
+
+    def get_uia(self):
+        """Lazily creates the raw IUIAutomation client used for events and cached lookups."""
+        if self._uia is None:
+            self._uia = comtypes.client.CreateObject(UIA.CUIAutomation, interface=UIA.IUIAutomation)
+        return self._uia
+
+    @debug_trace
+    def watch_submit_button(self, button):
+        """Subscribes to UIA change events on the submit button and its parent subtree."""
+        try:
+            uia = self.get_uia()
+            if self._button_handler is None:
+                self._button_handler = ButtonEventHandler(self.button_changed)
+            else:
+                uia.RemoveAllEventHandlers()
+            element = button.element_info.element
+            uia.AddPropertyChangedEventHandler(
+                element, UIA.TreeScope_Element, None, self._button_handler,
+                [UIA.UIA_NamePropertyId, UIA.UIA_IsEnabledPropertyId])
+            parent = button.element_info.parent
+            if parent is not None:
+                uia.AddStructureChangedEventHandler(
+                    parent.element, UIA.TreeScope_Subtree, None, self._button_handler)
+            self._watched_btn = button
+        except (COMError, OSError) as e:
+            # Falls back to slow polling in wait_for_button_change.
+            print(f"Unable to subscribe to button events: {e}", file=sys.stderr, flush=True)
+            self._watched_btn = None
+
+    def unwatch_submit_button(self):
+        """Removes the UIA handlers so no callback reaches Python during shutdown."""
+        if self._uia is None or self._button_handler is None:
+            return
+        try:
+            self._uia.RemoveAllEventHandlers()
+        except COMError as e:
+            print(f"Unable to remove button events: {e}", file=sys.stderr, flush=True)
+        self._watched_btn = None
+
+    @debug_trace
+    def wait_for_button_change(self, timeout=5):
+        """Blocks until the submit button changes, polling every timeout seconds as a fallback."""
+        button = self.find_submit_button()
+        if button is not None and button is not self._watched_btn:
+            self.watch_submit_button(button)
+        self.button_changed.wait(timeout)
+        self.button_changed.clear()
+
+    def wait_until(self, pred, timeout, initial=0.05, factor=1.5, cap=0.5):
+        """Polls pred with exponential backoff, returns False if timeout expires first."""
+        deadline = time.monotonic() + timeout
+        delay = initial
+        while not pred():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(delay, remaining))
+            delay = min(delay * factor, cap)
+        return True
+
     @debug_trace
     def new_thread(self):
         """Triggers a new thread and refreshes handles to prevent stale elements."""
+        before = self.read_text_elements()
         self.bezi_window.set_focus()
         self.bezi_window.type_keys("^T")
-        time.sleep(1)
-        self.find_windows()
+        # The old thread's button is still on screen right after Ctrl+T, wait for the transcript
+        # to change instead. An empty transcript cannot change, and the old 1s sleep stays the ceiling.
+        if before:
+            self.wait_until(lambda: self.read_text_elements() != before, timeout=1)
+        self._submit_btn = None
+        self.ensure_window()
         self.close_dialogs()
 
+    @debug_trace
+    def await_inactive(self, timeout=None, dialog_interval=5):
+        """Waits for the INACTIVE icon, checking for dialogs every dialog_interval seconds
+        rather than on every poll. Waits indefinitely when timeout is None."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        last_dialog_check = float("-inf")
+        while deadline is None or time.monotonic() < deadline:
+            if self.get_bezi_state() == "INACTIVE":
+                return True
+            now = time.monotonic()
+            if now - last_dialog_check > dialog_interval:
+                self.close_dialogs()
+                last_dialog_check = now
+            self.wait_for_button_change(timeout=1)
+        return False
+
     @debug_trace
     def send_prompt(self, message):        
         if not message: raise ValueError("Empty prompt")
         
         # Wait until the button icon is INACTIVE, anything else means that
         # the ai is busy.
-        while "INACTIVE" != self.get_bezi_state():
-            self.close_dialogs()
-            time.sleep(1)
+        self.await_inactive()
         self.close_dialogs()
             
         try:
-            self.find_windows()            
+            self.ensure_window()
             prompt_box = self.bezi_window.descendants(control_type="Edit")[-1]
             prompt_box.set_text(message)
-            time.sleep(1)
+            self.wait_until(lambda: self.get_bezi_state() == "READY", timeout=1)
             self.bezi_window.type_keys("{ENTER}")
-            time.sleep(2)
+            # READY is still showing from the typed text, only BUSY means the prompt was taken.
+            self.wait_until(lambda: self.get_bezi_state() == "BUSY", timeout=10)
         except Exception as e:
             print(f"unable to find prompt box: {e}", file=sys.stderr, flush=True)
             return False
-        self.find_windows()
+        self.ensure_window()
         
         # Again wait for the button icon to become INACTIVE.
-        while "INACTIVE" != self.get_bezi_state():
-            self.close_dialogs()
-            time.sleep(1)
+        self.await_inactive()
         self.close_dialogs()
 
-        self.find_windows()
-        elements = self.bezi_window.descendants(control_type="Text")
-        return [e.window_text().strip() for e in elements]
+        self.ensure_window()
+        return self.read_text_elements()
+
+    @debug_trace
+    def read_text_elements(self):
+        """Fetches the names of all Text descendants in one cached UIA FindAll call."""
+        try:
+            uia = self.get_uia()
+            cache_request = uia.CreateCacheRequest()
+            cache_request.AddProperty(UIA.UIA_NamePropertyId)
+            cache_request.AutomationElementMode = UIA.AutomationElementMode_None
+            condition = uia.CreatePropertyCondition(UIA.UIA_ControlTypePropertyId, UIA.UIA_TextControlTypeId)
+            root = self.bezi_window.element_info.element
+            found = root.FindAllBuildCache(UIA.TreeScope_Descendants, condition, cache_request)
+            return [(found.GetElement(i).CachedName or "").strip() for i in range(found.Length)]
+        except COMError as e:
+            print(f"Cached text lookup failed, walking the tree: {e}", file=sys.stderr, flush=True)
+            elements = self.bezi_window.descendants(control_type="Text")
+            return [e.window_text().strip() for e in elements]
 
     @debug_trace
     def close_dialogs(self):
         self.click_button_by_name("Continue")
-        self.find_windows()
         self.click_button_by_name("Keep All")
-        self.find_windows()
 
     @debug_trace
     def click_button_by_name(self, button_name):
+        """Clicks a button by name if one is showing.
+
+        A single UIA FindFirst with a Button+Name condition replaces child_window(..., timeout=5),
+        whose 5 second wait was spent in full on every call when no dialog was open."""
         try:
-            button = self.bezi_window.child_window(title=button_name, control_type="Button", timeout=5)
-            if button:
-                button.click_input()
+            uia = self.get_uia()
+            condition = uia.CreateAndCondition(
+                uia.CreatePropertyCondition(UIA.UIA_ControlTypePropertyId, UIA.UIA_ButtonControlTypeId),
+                uia.CreatePropertyCondition(UIA.UIA_NamePropertyId, button_name))
+            root = self.bezi_window.element_info.element
+            element = root.FindFirst(UIA.TreeScope_Descendants, condition)
+            if element:
+                UIAWrapper(UIAElementInfo(element)).click_input()
                 return True
-        except:
-            return False
+        except (COMError, ElementNotFoundError):
+            pass
         return False
 
     @debug_trace
@@ -209,15 +597,33 @@ class BeziBridge:
 
     @debug_trace
     def load_config(self):
-        if os.path.exists(self.config_file) and os.path.getsize(self.config_file) > 0:
+        if self._loaded_config is not None:
+            return self._loaded_config
+        config = {"initialized": False, "bezi_path": None}
+        try:
             with open(self.config_file, "r") as f:
-                return json.load(f)
-        return {"initialized": False, "bezi_path": None}
+                data = f.read()
+            if data:
+                config = json.loads(data)
+                self._saved_config_json = json.dumps(config)
+        except FileNotFoundError:
+            pass
+        self._loaded_config = config
+        return config
 
     @debug_trace
     def save_config(self, config):
-        with open(self.config_file, "w") as f:
-            json.dump(config, f)
+        """Writes the config atomically, skipping the write when nothing changed on disk."""
+        data = json.dumps(config)
+        if data == self._saved_config_json:
+            return
+        tmp_file = self.config_file + ".tmp"
+        with open(tmp_file, "w") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.config_file)
+        self._saved_config_json = data
 
     def parse_arguments(self):
         parser = argparse.ArgumentParser()
@@ -230,24 +636,32 @@ class BeziBridge:
 
     @debug_trace
     def get_button_state(self, btn_wrapper):
-        current_img = btn_wrapper.capture_as_image().convert('RGB')
-        if self.images_match(self.ready_icon_busy, current_img, 0.90):
-            return "BUSY"
-        if self.images_match(self.ready_icon_inactive, current_img, 0.90):
-            return "INACTIVE"
-        if self.images_match(self.ready_icon_active, current_img, 0.90):
-            return "READY"
+        cur = self.capture_button(btn_wrapper)
+        # A size change means none of the references can match, skip the comparison.
+        if cur.shape != self.ref_stack.shape[1:]:
+            return "UNKNOWN"
+        # XOR stays in uint8 and reuses the scratch buffer, non-zero bytes are mismatches.
+        np.bitwise_xor(self.ref_stack, cur[None, ...], out=self._xor_scratch)
+        diffs = np.count_nonzero(self._xor_scratch.reshape(len(self.ref_labels), -1), axis=1)
+        eq = 1 - diffs / self._xor_scratch[0].size
+        i = int(eq.argmax())
+        if eq[i] > 0.90:
+            return self.ref_labels[i]
         return "UNKNOWN"
 
-    @debug_trace
-    def images_match(self, img1, img2, threshold=0.95):
-        try:
-            i1, i2 = np.array(img1), np.array(img2)
-            if i1.shape != i2.shape: return False
-            matching = np.mean(i1 == i2)
-            return matching > threshold
-        except:
-            return False
+    def capture_button(self, btn_wrapper):
+        """Captures the button once as a uint8 RGB array."""
+        if self.grabber is not None and btn_wrapper is self._submit_btn:
+            # The rectangle was already fetched when the cached button was validated.
+            rect = self._submit_btn_rect
+            cur = self.grabber.grab(rect.left, rect.top)
+            if cur is not None:
+                return cur
+        img = btn_wrapper.capture_as_image()
+        # convert() copies even when the mode already matches.
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        return np.asarray(img)
 
     @debug_trace
     def run(self):
@@ -264,6 +678,7 @@ class BeziBridge:
             result = self.send_prompt(self.bezi_prompt)
             return (True, result)
         finally:
+            self.unwatch_submit_button()
             self.set_keep_awake(False)
 
 if __name__ == "__main__":
@@ -271,6 +686,10 @@ if __name__ == "__main__":
     args = bridge.parse_arguments()
     if args.debug:
         perf_logger.console_debug = True
+    elif not os.environ.get("BEZI_DEBUG"):
+        # Nobody reads the timings, so skip the tracing overhead on every call.
+        perf_logger.disable()
+        strip_debug_trace(BeziBridge)
     
     try:
         success, result = bridge.run()